@@ -10,6 +10,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 import os
 from pathlib import Path
+from typing import Literal
 
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
@@ -25,61 +26,64 @@ activities = {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     },
     # Sports related activities
     "Soccer Team": {
         "description": "Join the school soccer team and compete in matches",
         "schedule": "Wednesdays, 4:00 PM - 5:30 PM",
         "max_participants": 18,
-        "participants": ["alex@mergington.edu", "lucas@mergington.edu"]
+        "participants": {"alex@mergington.edu", "lucas@mergington.edu"}
     },
     "Basketball Club": {
         "description": "Practice basketball skills and play friendly games",
         "schedule": "Thursdays, 3:30 PM - 5:00 PM",
         "max_participants": 15,
-        "participants": ["mia@mergington.edu", "noah@mergington.edu"]
+        "participants": {"mia@mergington.edu", "noah@mergington.edu"}
     },
     # Artistic activities
     "Art Workshop": {
         "description": "Explore painting, drawing, and sculpture techniques",
         "schedule": "Mondays, 4:00 PM - 5:30 PM",
         "max_participants": 16,
-        "participants": ["ava@mergington.edu", "liam@mergington.edu"]
+        "participants": {"ava@mergington.edu", "liam@mergington.edu"}
     },
     "Drama Club": {
         "description": "Act, direct, and produce school plays and performances",
         "schedule": "Tuesdays, 5:00 PM - 6:30 PM",
         "max_participants": 20,
-        "participants": ["ella@mergington.edu", "jack@mergington.edu"]
+        "participants": {"ella@mergington.edu", "jack@mergington.edu"}
     },
     # Intellectual activities
     "Mathletes": {
         "description": "Compete in math competitions and solve challenging problems",
         "schedule": "Fridays, 4:00 PM - 5:30 PM",
         "max_participants": 10,
-        "participants": ["oliver@mergington.edu", "isabella@mergington.edu"]
+        "participants": {"oliver@mergington.edu", "isabella@mergington.edu"}
     },
     "Science Club": {
         "description": "Conduct experiments and explore scientific concepts",
         "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
         "max_participants": 14,
-        "participants": ["charlotte@mergington.edu", "henry@mergington.edu"]
+        "participants": {"charlotte@mergington.edu", "henry@mergington.edu"}
     }
 }
 
+# Known activity names, so unknown names are rejected during request validation
+ActivityName = Literal[tuple(activities)]
+
 
 @app.get("/")
 def root():
@@ -88,16 +92,16 @@ def root():
 
 @app.get("/activities")
 def get_activities():
-    return activities
+    # Participants are stored as sets; serialize them as sorted lists
+    return {
+        name: {**details, "participants": sorted(details["participants"])}
+        for name, details in activities.items()
+    }
 
 
 @app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
+def signup_for_activity(activity_name: ActivityName, email: str):
     """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
-
     # Get the specific activity
     activity = activities[activity_name]
 
@@ -106,17 +110,13 @@ def signup_for_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student already signed up for this activity")
     
     # Add student
-    activity["participants"].append(email)
+    activity["participants"].add(email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
 @app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str):
+def unregister_from_activity(activity_name: ActivityName, email: str):
     """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
-
     # Get the specific activity
     activity = activities[activity_name]
 
@@ -125,5 +125,5 @@ def unregister_from_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student is not registered for this activity")
     
     # Remove student
-    activity["participants"].remove(email)
+    activity["participants"].discard(email)
     return {"message": f"Unregistered {email} from {activity_name}"}
@@ -1,29 +1,88 @@
+import pickle
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from src.app import app
+import pytest_asyncio
+from src.app import app, activities
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--fast",
+        action="store_true",
+        default=False,
+        help="Skip tests marked as slow.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: long-running integration tests")
+    config.addinivalue_line("markers", "needs_reset: restore activities after each test")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect slow tests when running with --fast."""
+    if not config.getoption("--fast"):
+        return
+    selected = [item for item in items if item.get_closest_marker("slow") is None]
+    deselected = [item for item in items if item.get_closest_marker("slow") is not None]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize tests requesting ``activity_name`` over every activity."""
+    if "activity_name" in metafunc.fixturenames:
+        metafunc.parametrize("activity_name", list(activities.keys()))
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """Create a single async client bound to the app for the whole session."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+        yield test_client
 
 @pytest.fixture
-def client():
-    """Create a test client for the FastAPI application."""
-    return TestClient(app)
+def signup(client):
+    """Return a helper that signs a student up for an activity."""
+    def _signup(activity, email):
+        return client.post(f"/activities/{activity}/signup", params={"email": email})
+    return _signup
 
 @pytest.fixture
-def reset_activities():
-    """Reset activities to initial state before each test."""
-    from src.app import activities
-    
-    # Store original state
-    original_activities = {}
-    for name, details in activities.items():
-        original_activities[name] = {
-            "description": details["description"],
-            "schedule": details["schedule"],
-            "max_participants": details["max_participants"],
-            "participants": details["participants"].copy()  # Create a copy of the list
-        }
-    
+def unregister(client):
+    """Return a helper that unregisters a student from an activity."""
+    def _unregister(activity, email):
+        return client.delete(f"/activities/{activity}/unregister", params={"email": email})
+    return _unregister
+
+@pytest.fixture(scope="session")
+def _initial_activities_snapshot():
+    """Snapshot the initial activities once for the whole test session."""
+    return pickle.dumps(activities)
+
+@pytest.fixture
+def reset_activities(_initial_activities_snapshot):
+    """Reset activities to initial state after each test."""
     yield  # Run the test
-    
+
     # Restore original state after test
     activities.clear()
-    activities.update(original_activities)
\ No newline at end of file
+    activities.update(pickle.loads(_initial_activities_snapshot))
+
+@pytest.fixture(scope="class")
+def reset_activities_class(_initial_activities_snapshot):
+    """Reset activities to initial state once after each test class."""
+    yield  # Run the test class
+
+    # Restore original state after the class
+    activities.clear()
+    activities.update(pickle.loads(_initial_activities_snapshot))
+
+@pytest.fixture(autouse=True)
+def _reset_marked_tests(request):
+    """Apply reset_activities to tests marked needs_reset."""
+    if (request.node.get_closest_marker("needs_reset") is not None
+            and "reset_activities_class" not in request.fixturenames):
+        request.getfixturevalue("reset_activities")